@@ -1,16 +1,66 @@
+import calendar
+import io
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import seaborn as sns
 from datetime import datetime
 import numpy as np
+from categories import CATEGORY_MAPPING
 from plotters import (plot_for_others, plot_onetime_distribution,
                       plot_category_distribution, plot_sunburst,
                       plot_cumulative_expense, plot_expense_timeseries)
 
+# With copy-on-write, filtered frames and DataFrame.assign share column
+# data with their parent until a column is actually modified
+pd.options.mode.copy_on_write = True
+
 # Set page config
 st.set_page_config(page_title="Expense Analyzer", layout="wide")
 
+
+@st.cache_data(show_spinner="Reading expense data...")
+def load_expenses(file_bytes):
+    # Streamlit reruns the whole script on every interaction, so parse the
+    # upload once and reuse it until a different file is uploaded.
+    # calamine parses both .xls and .xlsx natively instead of through openpyxl/xlrd
+    df = pd.read_excel(io.BytesIO(file_bytes), engine='calamine')
+
+    # Convert Date column to datetime if not already, and keep the rows in date order.
+    # Rows without a date (e.g. a totals row) never fall in any analysis period
+    df['Date'] = pd.to_datetime(df['Date'])
+    df = df.dropna(subset=['Date'])
+    df = df.sort_values('Date', kind='stable', ignore_index=True)
+
+    # Ensure category column is string type
+    df['category'] = df['category'].astype(str)
+
+    # Create NewCategory column with the default mapping; mapping through a
+    # categorical looks up each distinct category once instead of once per row
+    categories = df['category'].astype('category')
+    df['NewCategory'] = categories.map(
+        lambda category: CATEGORY_MAPPING.get(category.lower(), category)).astype(object)
+
+    # Year lists the selectable years on every rerun, extract it once
+    df['Year'] = df['Date'].dt.year.astype('int16')
+    return df
+
+
+def filter_period(df, start, end):
+    # Rows are sorted by Date, so the rows in [start, end) form a contiguous
+    # slice that two binary searches find without comparing every date
+    start_row, end_row = df['Date'].searchsorted([pd.Timestamp(start), pd.Timestamp(end)])
+    return df.iloc[start_row:end_row]
+
+
+# Every widget interaction reruns this script; cache the figures so they are only
+# rebuilt when the data passed to them changes, not when another plot is toggled
+plot_sunburst = st.cache_data(plot_sunburst, max_entries=32, show_spinner=False)
+plot_onetime_distribution = st.cache_data(plot_onetime_distribution, max_entries=32, show_spinner=False)
+plot_cumulative_expense = st.cache_data(plot_cumulative_expense, max_entries=32, show_spinner=False)
+plot_expense_timeseries = st.cache_data(plot_expense_timeseries, max_entries=32, show_spinner=False)
+
+
 # Title and description
 st.title("Expense Analysis Dashboard")
 st.write("Upload your expense data and analyze spending patterns")
@@ -22,47 +72,43 @@ with st.sidebar:
     
     if uploaded_file is not None:
         # Read the data
-        df = pd.read_excel(uploaded_file)
-        
-        # Convert Date column to datetime if not already
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Ensure category column is string type
-        df['category'] = df['category'].astype(str)
+        df = load_expenses(uploaded_file.getvalue())
         
         # Selection options for date filtering
         analysis_type = st.radio("Select Analysis Type", ["Year", "Month", "Day", "Custom Range"])
         
         if analysis_type == "Year":
-            available_years = sorted(df['Date'].dt.year.unique())
+            available_years = sorted(df['Year'].unique())
             selected_year = st.selectbox("Select Year", available_years)
-            df_filtered = df[df['Date'].dt.year == selected_year].copy()
+            year_start = pd.Timestamp(int(selected_year), 1, 1)
+            df_filtered = filter_period(df, year_start, year_start + pd.DateOffset(years=1))
             period_text = f"Year {selected_year}"
         
         elif analysis_type == "Month":
-            available_years = sorted(df['Date'].dt.year.unique())
+            available_years = sorted(df['Year'].unique())
             selected_year = st.selectbox("Select Year", available_years)
-            available_months = sorted(df[df['Date'].dt.year == selected_year]['Date'].dt.month.unique())
-            month_names = {1: "January", 2: "February", 3: "March", 4: "April", 5: "May", 6: "June",
-                           7: "July", 8: "August", 9: "September", 10: "October", 11: "November", 12: "December"}
-            month_name_options = [month_names[month] for month in available_months]
-            selected_month_name = st.selectbox("Select Month", month_name_options)
-            selected_month = [k for k, v in month_names.items() if v == selected_month_name][0]
-            df_filtered = df[(df['Date'].dt.year == selected_year) & (df['Date'].dt.month == selected_month)].copy()
-            period_text = f"{selected_month_name} {selected_year}"
+            year_start = pd.Timestamp(int(selected_year), 1, 1)
+            df_year = filter_period(df, year_start, year_start + pd.DateOffset(years=1))
+            available_months = sorted(df_year['Date'].dt.month.unique())
+            selected_month = st.selectbox("Select Month", available_months,
+                                          format_func=lambda month: calendar.month_name[month])
+            month_start = pd.Timestamp(int(selected_year), int(selected_month), 1)
+            df_filtered = filter_period(df_year, month_start, month_start + pd.DateOffset(months=1))
+            period_text = f"{calendar.month_name[selected_month]} {selected_year}"
         
         elif analysis_type == "Day":
             selected_date = st.date_input("Select Date")
-            df_filtered = df[df['Date'] == pd.to_datetime(selected_date)].copy()
+            day_start = pd.Timestamp(selected_date)
+            df_filtered = filter_period(df, day_start, day_start + pd.DateOffset(days=1))
             period_text = f"Date {selected_date.strftime('%Y-%m-%d')}"
         
         elif analysis_type == "Custom Range":
-            start_date = st.date_input("Start Date", value=df['Date'].min())
-            end_date = st.date_input("End Date", value=df['Date'].max())
+            start_date = st.date_input("Start Date", value=df['Date'].iloc[0])
+            end_date = st.date_input("End Date", value=df['Date'].iloc[-1])
             if start_date > end_date:
                 st.error("End Date should be after Start Date")
             else:
-                df_filtered = df[(df['Date'] >= pd.to_datetime(start_date)) & (df['Date'] <= pd.to_datetime(end_date))].copy()
+                df_filtered = filter_period(df, start_date, pd.Timestamp(end_date) + pd.DateOffset(days=1))
                 period_text = f"Period {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
         
         # Add dynamic title based on selected period
@@ -86,39 +132,19 @@ with st.sidebar:
 
 # Main content area
 if 'df_filtered' in locals() and not df_filtered.empty:
-    # Apply default category mapping if selected
-    if use_default_categories:
-        category_mapping = {
-            'grocery': 'Food', 'Grocery': 'Food', 'snacks': 'Food', 'Snacks': 'Food',
-            'dining': 'Food', 'Dining': 'Food', 'medicines': 'Personal Care and Medicines',
-            'Medicines': 'Personal Care and Medicines', 'personal care': 'Personal Care and Medicines',
-            'Personal care': 'Personal Care and Medicines', 'misc': 'Miscellaneous',
-            'Misc': 'Miscellaneous', 'entertainment': 'Entertainment and Books', 'Entertainment': 'Entertainment and Books',
-            'books': 'Entertainment and Books', 'Books': 'Entertainment and Books', 'housing': 'Housing and Utilities',
-            'Housing': 'Housing and Utilities', 'utility': 'Housing and Utilities', 'Utility': 'Housing and Utilities',
-            'clothing': 'Household and Clothing', 'Clothing': 'Household and Clothing', 'household': 'Household and Clothing',
-            'Household': 'Household and Clothing', 'furniture': 'Electronics and Furniture', 'Furniture': 'Electronics and Furniture',
-            'electronics': 'Electronics and Furniture', 'Electronics': 'Electronics and Furniture', 'supplements': 'Fitness',
-            'Supplements': 'Fitness', 'shoes': 'Fitness', 'Shoes': 'Fitness', 'sports event': 'Fitness', 'Sports event': 'Fitness',
-            'sports watch': 'Fitness', 'Sports watch': 'Fitness', 'sports clothing': 'Fitness', 'Sports clothing': 'Fitness',
-            'sports rental': 'Fitness', 'Sports rental': 'Fitness', 'gym': 'Fitness', 'Gym': 'Fitness', 'sports equipment': 'Fitness',
-            'Sports equipment': 'Fitness', 'commute': 'Transportation', 'Commute': 'Transportation', 'ride share': 'Transportation',
-            'Ride share': 'Transportation', 'tokyo metro': 'Transportation', 'Tokyo Metro': 'Transportation', 'flight tickets': 'Transportation',
-            'Flight tickets': 'Transportation', 'souvenirs': 'Souvenirs/Gifts/Treats', 'Souvenirs': 'Souvenirs/Gifts/Treats',
-            'treat': 'Souvenirs/Gifts/Treats', 'Treat': 'Souvenirs/Gifts/Treats', 'gift': 'Souvenirs/Gifts/Treats', 'Gift': 'Souvenirs/Gifts/Treats'
-        }
-        
-        # Create NewCategory column
-        df_filtered['NewCategory'] = df_filtered['category'].map(category_mapping)
-        df_filtered['NewCategory'] = df_filtered['NewCategory'].fillna(df_filtered['category'])
-    else:
+    # The default category mapping is applied in load_expenses, undo it if not selected
+    if not use_default_categories:
         df_filtered['NewCategory'] = df_filtered['category']
 
     # Data Processing
     df_filtered = df_filtered[df_filtered['Expense'] != 0]
+    if df_filtered.empty:
+        st.info("No non-zero expenses in this period")
+        st.stop()
     
-    # Calculate total expenses, average monthly, and daily expenses
-    period_days = (df_filtered['Date'].max() - df_filtered['Date'].min()).days + 1
+    # Calculate total expenses, average monthly, and daily expenses; rows are in
+    # date order, so the period ends are the first and last rows
+    period_days = (df_filtered['Date'].iloc[-1] - df_filtered['Date'].iloc[0]).days + 1
     period_months = period_days / 30
     total_expense = df_filtered['Expense'].sum()
     average_monthly_expense = total_expense / period_months
@@ -0,0 +1,16 @@
+# Default grouping of expense categories into broader categories.
+# Keys are lowercase, categories are matched case-insensitively.
+CATEGORY_MAPPING = {
+    'grocery': 'Food', 'snacks': 'Food', 'dining': 'Food',
+    'medicines': 'Personal Care and Medicines', 'personal care': 'Personal Care and Medicines',
+    'misc': 'Miscellaneous',
+    'entertainment': 'Entertainment and Books', 'books': 'Entertainment and Books',
+    'housing': 'Housing and Utilities', 'utility': 'Housing and Utilities',
+    'clothing': 'Household and Clothing', 'household': 'Household and Clothing',
+    'furniture': 'Electronics and Furniture', 'electronics': 'Electronics and Furniture',
+    'supplements': 'Fitness', 'shoes': 'Fitness', 'sports event': 'Fitness', 'sports watch': 'Fitness',
+    'sports clothing': 'Fitness', 'sports rental': 'Fitness', 'gym': 'Fitness', 'sports equipment': 'Fitness',
+    'commute': 'Transportation', 'ride share': 'Transportation', 'tokyo metro': 'Transportation',
+    'flight tickets': 'Transportation',
+    'souvenirs': 'Souvenirs/Gifts/Treats', 'treat': 'Souvenirs/Gifts/Treats', 'gift': 'Souvenirs/Gifts/Treats'
+}
@@ -1,12 +1,31 @@
 import pandas as pd
 import plotly.express as px
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
+
+# Serialise figures with orjson (see requirements.txt), failing at import if it is
+# missing rather than silently falling back to the much slower json encoder
+pio.json.config.default_engine = 'orjson'
+
+# Colours for the broader categories, shared by the category plots
+CATEGORY_COLORS = {
+    'Housing and Utilities': '#e2c596',  # Softer goldenrod
+    'Food': '#99b98b',  # Softer olive green
+    'Transportation': '#cda180',  # Soft caramel
+    'Fitness': '#d6a7c3',  # Subtle mauve pink
+    'Souvenirs/Gifts/Treats': '#b4aea8',  # Warm gray
+    'Household and Clothing': '#e7d8c4',  # Very light taupe
+    'Entertainment and Books': '#909eb3',  # Muted gray-blue
+    'Miscellaneous': '#b3b3cc',  # Soft slate blue
+    'Personal Care and Medicines': '#b09fcb',  # Muted lavender
+}
 
 def plot_for_others(data):
 # Group data by 'for others' and calculate total expenses for each group
-    grouped_df = data.groupby('for others')['Expense'].sum().reset_index()
+    grouped_df = data.groupby('for others', sort=False)['Expense'].sum().reset_index()
 
 # Map 'for others' values to 'Yes' and 'No'
     grouped_df['for_label'] = grouped_df['for others'].map({0: 'No', 1: 'Yes'})
@@ -42,7 +61,7 @@ def plot_for_others(data):
     return fig
 
 def plot_onetime_distribution(data):
-        grouped_df = data.groupby('onetime')['Expense'].sum().reset_index()
+        grouped_df = data.groupby('onetime', sort=False)['Expense'].sum().reset_index()
         grouped_df['onetime_label'] = grouped_df['onetime'].map({0: 'Regular', 1: 'One-time'})
         
         fig = px.pie(
@@ -84,17 +103,7 @@ def plot_category_distribution(data):
         names='NewCategory',
         title='Expense Distribution by Category',
         color='NewCategory',
-        color_discrete_map={
-            'Housing and Utilities': '#e2c596',
-            'Food': '#99b98b',
-            'Transportation': '#cda180',
-            'Fitness': '#d6a7c3',
-            'Souvenirs/Gifts/Treats': '#b4aea8',
-            'Household and Clothing': '#e7d8c4',
-            'Entertainment and Books': '#909eb3',
-            'Miscellaneous': '#b3b3cc',
-            'Personal Care and Medicines': '#b09fcb',
-        }
+        color_discrete_map=CATEGORY_COLORS
     )
     
     fig.update_traces(
@@ -114,20 +123,14 @@ def plot_category_distribution(data):
     return fig
 
 def plot_sunburst(data):
-    fig  = px.sunburst(data, path=['NewCategory', 'category'], values='Expense',
+    # Aggregate to one row per leaf so plotly builds the hierarchy from the
+    # category totals instead of every individual expense
+    leaf_df = data.groupby(['NewCategory', 'category'], as_index=False)['Expense'].sum()
+
+    fig  = px.sunburst(leaf_df, path=['NewCategory', 'category'], values='Expense',
                     color='NewCategory',  # Color by the "NewCategory" column
                     title='Expense Distribution by Category',
-                    color_discrete_map={
-            'Housing and Utilities': '#e2c596',  # Softer goldenrod
-            'Food': '#99b98b',  # Softer olive green
-            'Transportation': '#cda180',  # Soft caramel
-            'Fitness': '#d6a7c3',  # Subtle mauve pink
-            'Souvenirs/Gifts/Treats': '#b4aea8',  # Warm gray
-            'Household and Clothing': '#e7d8c4',  # Very light taupe
-            'Entertainment and Books': '#909eb3',  # Muted gray-blue
-            'Miscellaneous': '#b3b3cc',  # Soft slate blue
-            'Personal Care and Medicines': '#b09fcb',  # Muted lavender
-        })
+                    color_discrete_map=CATEGORY_COLORS)
 
     # Update layout for aesthetics and size
     fig.update_layout(
@@ -148,9 +151,7 @@ def plot_sunburst(data):
 # have heatmap instead
 def plot_cumulative_expense(data, threshold=50000):
     # Prepare data
-    data = data.copy()
-    data['Date'] = pd.to_datetime(data['Date'])
-    data['Cumulative Expense'] = data['Expense'].cumsum()
+    data = data.assign(**{'Cumulative Expense': data['Expense'].cumsum()})
     
     
     # Plot cumulative expense over time
@@ -198,12 +199,26 @@ def plot_cumulative_expense(data, threshold=50000):
     )
     return fig
 
+def moving_average(values, window):
+    # Trailing mean from the difference of two cumulative sums: a single pass
+    # over the array instead of pandas' windowed aggregation. Like
+    # Series.rolling(window).mean(), a point is NaN unless its window holds
+    # `window` non-missing values.
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+
+    averages = np.full(len(values), np.nan)
+    averages[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return averages
+
 def plot_expense_timeseries(data, dma_window=10):
     # Prepare data
-    data = data.copy()
-    data['Date'] = pd.to_datetime(data['Date'])
     dma_label = f"{dma_window}DMA"
-    data[dma_label] = data['Expense'].rolling(window=dma_window).mean()
+    dma = moving_average(data['Expense'].to_numpy(), dma_window)
     
     # Plot daily expenses and moving average
     fig = px.line(
@@ -215,11 +230,13 @@ def plot_expense_timeseries(data, dma_window=10):
         color_discrete_sequence=['#76a5af']
     )
 
-    # Add moving average line
+    # Add moving average line, drawn with WebGL once plotly express switches the
+    # expense line to it (above 1000 points) so the figure uses a single renderer
+    scatter = go.Scattergl if len(data) > 1000 else go.Scatter
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=data['Date'],
-            y=data[dma_label],
+            y=dma,
             mode='lines',
             name=dma_label,
             line=dict(color='#f5a399', width=2, dash='dash')